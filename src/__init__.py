@@ -1,11 +1,15 @@
+from .bootstrap import Bootstrap
 from .iqr import Iqr
 from .mean import Mean
+from .similarity import SimilarityIndex
 from .stddeviation import StdDeviation
 from .superscore import SuperScoreModel
 
 __all__ = (
+    "Bootstrap",
     "Iqr",
     "Mean",
+    "SimilarityIndex",
     "StdDeviation",
     "SuperScoreModel",
 )
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.iqr import Iqr
+from src.mean import Mean
+from src.stddeviation import StdDeviation
+from src.superscore import SuperScoreModel
+from utils.ranks import average_ranks, PRELIM_DECIMALS
+from utils.results import Results
+
+_CHUNK = 256  # resamples evaluated together, bounds the (resamples, teams, events) arrays
+
+
+def _quantile(ordered: np.ndarray, q: float) -> np.ndarray:
+    """
+    np.quantile (linear) along the last axis of data that is already sorted along it
+    :return: np.ndarray, ordered.shape[:-1] + (1,)
+    """
+    pos = (ordered.shape[-1] - 1) * q
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, ordered.shape[-1] - 1)
+    return (
+        ordered[..., lo: lo + 1]
+        + (ordered[..., hi: hi + 1] - ordered[..., lo: lo + 1]) * (pos - lo)
+    )
+
+
+def _fences(
+        model: type[Iqr | StdDeviation | Mean], ordered: np.ndarray, alpha: float
+) -> np.ndarray:
+    """
+    :param ordered: np.ndarray (resamples, teams, events) of placements, sorted along events
+    :return: np.ndarray (resamples, teams, 1), placements above this are bombed events
+    """
+    if model is Iqr:
+        q1, q3 = _quantile(ordered, 0.25), _quantile(ordered, 0.75)
+        return (q3 - q1) * alpha + q3
+    if model is StdDeviation:
+        return ordered.mean(axis=-1, keepdims=True) + alpha * ordered.std(
+            axis=-1, keepdims=True
+        )
+    if model is Mean:
+        return ordered.mean(axis=-1, keepdims=True) * alpha
+    raise TypeError(f"{model.__name__} is not a supported model")
+
+
+class Bootstrap:
+    """
+    Resamples the non trial events of a tournament with replacement and re-runs the
+    drop/superscore/ensemble pipeline of Tournament.aggregate on every resample at once.
+    With the identity resample (every event once) it reproduces Tournament.prelim.
+    The results file is read a single time; each resample is a fancy index into
+    the placement arrays, so no Results objects are rebuilt.
+    Teams are stored grouped by school, so a school's best team is a reduceat over
+    contiguous columns and no (resamples, schools, teams) array is ever built.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            models_to_use: list[
+                tuple[float, type[Iqr | StdDeviation | Mean | SuperScoreModel]]
+            ],
+            alphas: dict[type[Iqr | StdDeviation | Mean], float],
+            resamples: int = 2000,
+            seed: int | None = None,
+    ):
+        """
+        :param alphas: alpha of every drops model, the same table Tournament builds them with
+        """
+        if sum([k for k, _ in models_to_use]) != 1:
+            raise ValueError("Sum of weights must equal 1")
+        for _, model in models_to_use:
+            if model is not SuperScoreModel and model not in alphas:
+                raise ValueError(f"No alpha given for {model.__name__}")
+        self._results = Results(path)
+        self._models = models_to_use
+        self._alphas = alphas
+        self.resamples = resamples
+        self._rng = np.random.default_rng(seed)
+        self._schools: list[str] = sorted(self._results.team_names)
+        self._team_scores: np.ndarray  # (events, teams), teams grouped by school
+        self._super_scores: np.ndarray  # (events, schools)
+        self._school_starts: np.ndarray  # (schools,) first team column of each school
+        self._ranks: np.ndarray | None = None  # (resamples, schools)
+        self._populate()
+
+    def _populate(self) -> None:
+        res = self._results
+        non_trials = list(res.walk_events)
+        n_teams = len(res.teams)
+        event_index = {e: i for i, e in enumerate(non_trials)}
+        school_index = {s: i for i, s in enumerate(self._schools)}
+        schools = {team["number"]: team["school"] for team in res.teams_data}
+        team_numbers = sorted(res.teams, key=lambda t: (school_index[schools[t]], t))
+        team_index = {t: i for i, t in enumerate(team_numbers)}
+
+        team_scores = np.full((len(non_trials), n_teams), n_teams, dtype=np.int32)
+        super_scores = np.full(
+            (len(non_trials), len(self._schools)), n_teams + 1, dtype=np.int32
+        )
+        for placement in res.raw_placements:
+            if placement["event"] in res.trial_events:
+                continue
+            t, e = team_index[placement["team"]], event_index[placement["event"]]
+            s = school_index[schools[placement["team"]]]
+            team_scores[e, t] = placement.get("place", n_teams)
+            super_scores[e, s] = min(
+                super_scores[e, s], placement.get("place", n_teams + 1)
+            )
+        self._team_scores = team_scores
+        self._super_scores = super_scores
+        self._school_starts = np.searchsorted(
+            [school_index[schools[t]] for t in team_numbers],
+            np.arange(len(self._schools)),
+        )
+
+    def _ordered(self, idx: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Resampled placements shared by every drops model, order doesn't matter to the fences
+        :return: (sorted, running total) both np.ndarray (resamples, teams, events), sorted along events
+        """
+        ordered = np.sort(self._team_scores[idx].transpose(0, 2, 1), axis=-1)
+        return ordered, np.cumsum(ordered, axis=-1, dtype=np.int32)
+
+    def _drop_scores(
+            self,
+            model: type[Iqr | StdDeviation | Mean],
+            ordered: np.ndarray,
+            running: np.ndarray,
+    ) -> np.ndarray:
+        """
+        :param ordered: np.ndarray (resamples, teams, events) of placements, sorted along events
+        :param running: np.ndarray, cumulative sum of ordered along events
+        :return: np.ndarray (resamples, schools), best team total per school after dropping
+        """
+        bombed = (ordered > _fences(model, ordered, self._alphas[model])).sum(axis=-1)
+        to_drop = np.rint(bombed.mean(axis=-1)).astype(int)  # (resamples,)
+        kept = ordered.shape[-1] - to_drop
+        totals = np.take_along_axis(
+            running, np.maximum(kept - 1, 0)[:, None, None], axis=-1
+        )[..., 0]
+        totals = np.where(kept[:, None] > 0, totals, 0)
+        return np.minimum.reduceat(totals, self._school_starts, axis=-1)
+
+    @property
+    def n_events(self) -> int:
+        return self._team_scores.shape[0]
+
+    def model_scores(
+            self,
+            model: type[Iqr | StdDeviation | Mean | SuperScoreModel],
+            idx: np.ndarray,
+    ) -> np.ndarray:
+        """
+        :param idx: np.ndarray (resamples, n_events) of event indices, one row per resample
+        :return: np.ndarray (resamples, schools), ret_scores/super_scores of the model per resample
+        """
+        if model is SuperScoreModel:
+            return self._super_scores[idx].sum(axis=1)
+        return self._drop_scores(model, *self._ordered(idx))
+
+    def evaluate(self, idx: np.ndarray) -> np.ndarray:
+        """
+        :param idx: np.ndarray (resamples, n_events) of event indices, one row per resample
+        :return: np.ndarray (resamples, schools), Tournament.prelim per resample
+        """
+        prelim = np.zeros((idx.shape[0], len(self._schools)))
+        for start in range(0, idx.shape[0], _CHUNK):
+            chunk = idx[start: start + _CHUNK]
+            ordered = None
+            for weight, model in self._models:
+                if model is SuperScoreModel:
+                    scores = self.model_scores(model, chunk)
+                else:
+                    if ordered is None:
+                        ordered = self._ordered(chunk)
+                    scores = self._drop_scores(model, *ordered)
+                prelim[start: start + _CHUNK] += average_ranks(scores) * weight
+        return np.round(prelim, PRELIM_DECIMALS)
+
+    def run(self) -> np.ndarray:
+        """
+        Ties in prelim are broken at random so no school is favoured by its name
+        :return: np.ndarray (resamples, schools) of ensemble ranks, columns follow self.schools
+        """
+        idx = self._rng.integers(0, self.n_events, size=(self.resamples, self.n_events))
+        prelim = self.evaluate(idx)
+        order = np.lexsort((self._rng.random(prelim.shape), prelim), axis=-1)
+        places = np.broadcast_to(np.arange(1, prelim.shape[1] + 1), prelim.shape)
+        ranks = np.empty(prelim.shape, dtype=int)
+        np.put_along_axis(ranks, order, places, axis=-1)
+        self._ranks = ranks
+        return self._ranks
+
+    @property
+    def schools(self) -> list[str]:
+        return self._schools
+
+    @property
+    def ranks(self) -> np.ndarray:
+        """
+        :return: np.ndarray (resamples, schools) of ensemble ranks, runs the bootstrap if needed
+        """
+        if self._ranks is None:
+            self.run()
+        return self._ranks
+
+    @property
+    def median_ranks(self) -> dict[str, float]:
+        """
+        :return: dict {school: median rank, ...} sorted by median rank
+        """
+        med = np.median(self.ranks, axis=0)
+        return dict(sorted(zip(self._schools, med.tolist()), key=lambda x: x[1]))
+
+    def rank_intervals(self, confidence: float = 0.95) -> dict[str, tuple[int, int]]:
+        """
+        :return: dict {school: (lower rank, upper rank), ...} percentile intervals,
+        both ends are places the school actually reached in some resample
+        """
+        tail = (1 - confidence) / 2 * 100
+        lo = np.percentile(self.ranks, tail, axis=0, method="lower")
+        hi = np.percentile(self.ranks, 100 - tail, axis=0, method="higher")
+        return {s: (int(lo[i]), int(hi[i])) for i, s in enumerate(self._schools)}
+
+    def medal_probability(self, medals: int | None = None) -> dict[str, float]:
+        """
+        :param medals: number of medalling places, defaults to the tournament's
+        :return: dict {school: P(rank <= medals), ...} sorted most likely first
+        """
+        if medals is None:
+            medals = self._results.tournament.get("medals", 6)
+        p = (self.ranks <= medals).mean(axis=0)
+        return dict(sorted(zip(self._schools, p.tolist()), key=lambda x: -x[1]))
+
+
+if __name__ == "__main__":
+    from src.tournament import Tournament
+
+    b = Tournament(
+        "../data/2023-01-21_mit_invitational_c.yaml",
+        [(0.1, Iqr), (0.6, StdDeviation), (0.1, Mean), (0.2, SuperScoreModel)],
+    ).bootstrap()
+    intervals = b.rank_intervals()
+    for school, p in b.medal_probability().items():
+        print(school, intervals[school], p)
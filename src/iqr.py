@@ -6,6 +6,7 @@ from .drops import Drops
 class Iqr(Drops):
     def __init__(self, file_path: str, alpha: float = 1.5):
         super().__init__(file_path, alpha)
+        self.method()
 
     def method(self):
         for placement in self.raw_placements:
@@ -4,6 +4,7 @@ from .drops import Drops
 class Mean(Drops):
     def __init__(self, file_path: str, alpha: float = 2):
         super().__init__(file_path, alpha)
+        self.method()
 
     def method(self):
         for placement in self.raw_placements:
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Generator, Iterable
+
+import numpy as np
+import yaml
+
+_PRIME = (1 << 31) - 1  # mersenne prime, keeps a * x inside int64
+
+
+def _load_schools(path: str) -> list[str]:
+    """
+    :return: list of schools that competed at the tournament, one entry per team
+    """
+    with open(path, "r") as f:
+        data = yaml.safe_load(f)
+    return [t["school"] for t in data["Teams"]]
+
+
+class SimilarityIndex:
+    """
+    Index over the school lists of a season of tournaments.
+    Every tournament is stored as a sparse incidence vector (the ids of its schools in a
+    season wide vocabulary), so strength-of-field against a reference roster is an exact
+    intersection count, done for the whole season in one array pass and cached per reference.
+    MinHash signatures banded into LSH buckets are only used to find candidates in
+    `similar`; the jaccard reported for a candidate is always the exact one.
+
+    A pair with jaccard J lands in a shared bucket with probability 1 - (1 - J^rows)^bands,
+    so recall drops off below the banding threshold (1 / bands)^(1 / rows), about 0.35 with
+    the defaults. Queries with a lower threshold skip the buckets and scan every tournament.
+    """
+
+    def __init__(
+            self,
+            paths: Iterable[str] = (),
+            num_perm: int = 256,
+            bands: int = 64,
+            seed: int = 1,
+    ):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self._rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.int64)
+        self._vocab: dict[str, int] = {}  # school: column of the incidence vectors
+        self._names: list[str] = []  # column: school
+        self._references: dict[str, list[str]] = {}  # unindexed reference path: schools
+        self._strengths: dict[str, dict[str, float]] = {}  # reference path: field_strengths
+        self._ids: dict[str, np.ndarray] = {}  # path: sorted unique school ids
+        self._signatures: dict[str, np.ndarray] = {}
+        self._team_counts: dict[str, int] = {}
+        self._buckets: list[dict[bytes, set[str]]] = [{} for _ in range(bands)]
+        for path in paths:
+            self.add(path)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, path: str) -> bool:
+        return os.path.abspath(path) in self._signatures
+
+    @property
+    def lsh_threshold(self) -> float:
+        """
+        :return: float, jaccard at which a pair becomes a candidate with probability ~0.5
+        """
+        return (1 / self.bands) ** (1 / self._rows)
+
+    def signature(self, schools: Iterable[str]) -> np.ndarray:
+        """
+        :return: np.ndarray of shape (num_perm,), the MinHash signature of the schools
+        """
+        x = np.array(
+            [zlib.crc32(s.encode("utf-8")) for s in set(schools)], dtype=np.int64
+        ) % _PRIME
+        if x.size == 0:
+            return np.full(self.num_perm, _PRIME, dtype=np.int64)
+        hashed = (self._a[:, None] * x[None, :] + self._b[:, None]) % _PRIME
+        return hashed.min(axis=1)
+
+    def add(self, path: str) -> np.ndarray:
+        """
+        Adds a tournament to the index, no-op if it is already indexed
+        :return: np.ndarray, signature of the tournament
+        """
+        path = os.path.abspath(path)
+        if path in self._signatures:
+            return self._signatures[path]
+        schools = self._references.pop(path, None) or _load_schools(path)
+        for school in schools:
+            if school not in self._vocab:
+                self._vocab[school] = len(self._names)
+                self._names.append(school)
+        ids = np.array(sorted({self._vocab[s] for s in schools}), dtype=np.int64)
+        sig = self.signature(schools)
+        self._ids[path] = ids
+        self._signatures[path] = sig
+        self._team_counts[path] = len(schools)
+        for band, key in enumerate(self._band_keys(sig)):
+            self._buckets[band].setdefault(key, set()).add(path)
+        self._strengths.clear()
+        return sig
+
+    def _band_keys(self, sig: np.ndarray) -> Generator[bytes]:
+        yield from (
+            sig[i * self._rows: (i + 1) * self._rows].tobytes()
+            for i in range(self.bands)
+        )
+
+    def _schools(self, field: str | Iterable[str]) -> list[str]:
+        """
+        :param field: unindexed path to a tournament or an iterable of school names (one per team)
+        :return: list of schools, unindexed paths are never added to the index
+        """
+        if not isinstance(field, str):
+            return list(field)
+        path = os.path.abspath(field)
+        return self._references.get(path) or _load_schools(path)
+
+    def _school_set(
+            self, field: str | Iterable[str], reference: bool = False
+    ) -> set[str]:
+        """
+        :param reference: cache the roster of an unindexed path, references are reused
+        :return: set of schools in the field, indexed paths are read from their ids
+        """
+        if isinstance(field, str):
+            path = os.path.abspath(field)
+            if path in self._ids:
+                return {self._names[i] for i in self._ids[path]}
+            if reference and path not in self._references:
+                self._references[path] = _load_schools(path)
+        return set(self._schools(field))
+
+    def _mask(self, schools: Iterable[str]) -> np.ndarray:
+        """
+        :return: np.ndarray of bool over the vocabulary, schools never indexed are left out
+        """
+        mask = np.zeros(len(self._vocab), dtype=bool)
+        mask[[self._vocab[s] for s in set(schools) if s in self._vocab]] = True
+        return mask
+
+    def _intersections(
+            self, paths: list[str], schools: Iterable[str]
+    ) -> np.ndarray:
+        """
+        :return: np.ndarray, exact number of shared schools between each path and the field
+        """
+        if not paths:
+            return np.zeros(0)
+        mask = self._mask(schools)
+        ids = [self._ids[p] for p in paths]
+        owner = np.repeat(np.arange(len(paths)), [len(i) for i in ids])
+        return np.bincount(
+            owner, weights=mask[np.concatenate(ids)], minlength=len(paths)
+        )
+
+    def jaccard(self, a: str | Iterable[str], b: str | Iterable[str]) -> float:
+        """
+        :return: float, [0, 1] jaccard similarity of the two fields
+        """
+        set_a, set_b = self._school_set(a), self._school_set(b)
+        union = len(set_a | set_b)
+        return len(set_a & set_b) / union if union else 0.0
+
+    def similar(
+            self, field: str | Iterable[str], threshold: float = 0.5
+    ) -> list[tuple[str, float]]:
+        """
+        Indexed tournaments that had a comparable field.
+        Candidates come from the LSH buckets when threshold >= lsh_threshold, otherwise
+        every tournament is checked.
+        :return: list of (path, jaccard) with jaccard >= threshold, most similar first
+        """
+        schools = self._school_set(field)
+        if threshold >= self.lsh_threshold:
+            candidates: set[str] = set()
+            for band, key in enumerate(self._band_keys(self.signature(schools))):
+                candidates |= self._buckets[band].get(key, set())
+        else:
+            candidates = set(self._signatures)
+        if isinstance(field, str):
+            candidates.discard(os.path.abspath(field))
+        paths = sorted(candidates)
+        inter = self._intersections(paths, schools)
+        sizes = np.array([len(self._ids[p]) for p in paths])
+        union = sizes + len(schools) - inter
+        j = np.divide(inter, union, out=np.zeros(len(paths)), where=union > 0)
+        return sorted(
+            [(p, float(s)) for p, s in zip(paths, j) if s >= threshold],
+            key=lambda x: x[1],
+            reverse=True,
+        )
+
+    def strength_of_field(
+            self, field: str | Iterable[str], reference: str | Iterable[str]
+    ) -> float:
+        """
+        Share of the field's teams whose school is in the reference field
+        (same measure as Tournament.set_comp)
+        Indexed paths are looked up in field_strengths(reference), anything else is intersected directly
+        :param field: path to a tournament or its schools, one entry per team
+        :return: float, [0, 1] 0 being least competitive, 1 being most competitive
+        """
+        if isinstance(field, str) and field in self:
+            return self.field_strengths(reference)[os.path.abspath(field)]
+        schools = self._schools(field)
+        if not schools:
+            return 0.0
+        return len(set(schools) & self._school_set(reference, True)) / len(schools)
+
+    def field_strengths(self, reference: str | Iterable[str]) -> dict[str, float]:
+        """
+        strength_of_field for every indexed tournament in one array computation,
+        cached per reference path until the next add
+        :return: dict {path: strength, ...}
+        """
+        key = os.path.abspath(reference) if isinstance(reference, str) else None
+        if key in self._strengths:
+            return self._strengths[key]
+        paths = list(self._signatures)
+        inter = self._intersections(paths, self._school_set(reference, True))
+        counts = np.array([self._team_counts[p] for p in paths], dtype=float)
+        strengths = dict(zip(paths, (inter / counts).tolist()))
+        if key is not None:
+            self._strengths[key] = strengths
+        return strengths
+
+
+if __name__ == "__main__":
+    index = SimilarityIndex(
+        [
+            "../data/2022-11-19_palatine_invitational_c.yaml",
+            "../data/2022-12-03_northview_invitational_c.yaml",
+            "../data/2023-01-21_mit_invitational_c.yaml",
+            "../data/2023-02-04_solon_invitational_c.yaml",
+            "../data/2023-02-18_penn_invitational_c.yaml",
+        ]
+    )
+    print(index.similar("../data/2023-01-21_mit_invitational_c.yaml", threshold=0.1))
+    print(index.field_strengths("../data/2023-05-20_nationals_c.yaml"))
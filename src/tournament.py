@@ -2,15 +2,26 @@ from __future__ import annotations
 
 import datetime
 
+import numpy as np
 import yaml
 
+from src.bootstrap import Bootstrap
 from src.drops import Drops
 from src.iqr import Iqr
 from src.mean import Mean
+from src.similarity import SimilarityIndex
 from src.stddeviation import StdDeviation
 from src.superscore import SuperScoreModel
+from utils.ranks import average_ranks, PRELIM_DECIMALS
 
 TESTING = False
+NATIONALS_PATH = "../data/2023-05-20_nationals_c.yaml"
+# alpha each drops model is built with, Bootstrap is handed the same table
+DROP_ALPHAS: dict[type[Iqr | StdDeviation | Mean], float] = {
+    Iqr: 1.5,
+    StdDeviation: 2,
+    Mean: 2,
+}
 
 
 class Tournament:
@@ -20,17 +31,21 @@ class Tournament:
             models_to_use: list[
                 tuple[float, type[Iqr | StdDeviation | Mean | SuperScoreModel]]
             ],
+            index: SimilarityIndex | None = None,
+            reference: str = NATIONALS_PATH,
     ):
         self._ranks: tuple[str] | None = None
         self._path = path
         self._data = {}
-        self._models: dict[float, Iqr | StdDeviation | Mean | SuperScoreModel] = {}
+        self._models: list[tuple[float, Iqr | StdDeviation | Mean | SuperScoreModel]] = []
         self._competitiveness: float = (
             0  # [0, 1] 0 being least competitive, 1 being most competitive
         )
         self._recentness: float = 0  # [0, 1] 0 being least recent, 1 being most recent
         self._raw_models = models_to_use
         self._prelim: dict[str, float] = {}
+        self._index = index
+        self._reference = reference
         if sum([k for k, _ in self._raw_models]) != 1:
             raise ValueError("Sum of weights must equal 1")
         self.setup()
@@ -59,16 +74,30 @@ class Tournament:
     def __self(
             self, model: type[Iqr | StdDeviation | Mean | SuperScoreModel], weight: float
     ) -> None:
-        _model = model(self._path, weight)
-        self._models[_model.weight] = _model
+        if issubclass(model, SuperScoreModel):
+            _model = model(self._path, weight)
+        else:  # drops models take alpha, not weight, and rank on their dropped scores
+            _model = model(self._path, DROP_ALPHAS[model])
+            _model.weight = weight
+            _model.drop()
+        self._models.append((weight, _model))
 
     def set_comp(self) -> float:
         """
         Sets the competitiveness of the tournament
         :return: float, [0, 1] 0 being least competitive, 1 being most competitive
         measured by the number of teams that competed at nationals at the tournament/total number of teams
+        read from the similarity index's field_strengths when the tournament is indexed
         """
-        with open("../data/2023-05-20_nationals_c.yaml", "r") as f:
+        if self._index is not None:
+            field = (
+                self._path
+                if self._path in self._index
+                else [t["school"] for t in self._data["Teams"]]
+            )
+            self._competitiveness = self._index.strength_of_field(field, self._reference)
+            return self._competitiveness
+        with open(self._reference, "r") as f:
             h = yaml.safe_load(f)
         national_tlist = [t["school"] for t in h["Teams"]]
         comped_tlist = [t["school"] for t in self._data["Teams"]]
@@ -80,41 +109,44 @@ class Tournament:
         return self._competitiveness
 
     def aggregate(self) -> tuple[str]:
+        """
+        Each school's prelim is the weighted sum of its rank in every model,
+        tied scores share the average rank
+        :return: tuple of school names in order of rank
+        """
         _prelim: dict[str, float] = {}
-        for j, (rel_model_weight, model) in enumerate(self._models.items()):
+        for rel_model_weight, model in self._models:
             assert isinstance(model, (Drops, SuperScoreModel))
-            if j == 0:  # populate dictionary
-                if isinstance(model, Drops):
-                    _prelim = {team: 0 for team in model.ret_scores}
-                else:
-                    _prelim = {team: 0 for team in model.super_scores}
-
             if isinstance(model, Drops):
-                rankings = [team for team in model.ret_scores]
-                for i, team in enumerate(rankings):
-                    _prelim[team] += (i + 1) * rel_model_weight
+                scores = model.ret_scores
             else:
-                rankings = [team for team in model.super_scores]
-                for i, team in enumerate(rankings):
-                    _prelim[team] += (i + 1) * rel_model_weight
-        self._prelim = _prelim
-        self._ranks = tuple(
-            [t for t in dict(sorted(_prelim.items(), key=lambda x: x[1]))]
-        )
+                scores = model.super_scores
+            schools = sorted(scores)
+            ranks = average_ranks(np.array([scores[t] for t in schools]))
+            for team, rank in zip(schools, ranks.tolist()):
+                _prelim[team] = _prelim.get(team, 0) + rank * rel_model_weight
+        self._prelim = {t: round(p, PRELIM_DECIMALS) for t, p in _prelim.items()}
+        self._ranks = tuple(sorted(self._prelim, key=lambda t: (self._prelim[t], t)))
         return self._ranks
 
+    def bootstrap(self, resamples: int = 2000, seed: int | None = None) -> Bootstrap:
+        """
+        :return: Bootstrap over the tournament's events using the same models and weights
+        """
+        return Bootstrap(self._path, self._raw_models, DROP_ALPHAS, resamples, seed)
+
     @property
     def model_list(self) -> list[Iqr | StdDeviation | Mean | SuperScoreModel]:
-        return list(self._models.values())
+        return [model for _, model in self._models]
 
     @property
     def prelim(self) -> dict[str, float]:
         return self._prelim
 
     @property
-    def models(self) -> dict[float, Iqr | StdDeviation | Mean | SuperScoreModel]:
+    def models(self) -> list[tuple[float, Iqr | StdDeviation | Mean | SuperScoreModel]]:
         """
-        :return: dict of models {weight: model, ...}
+        :return: list of models [(weight, model), ...]
         """
         return self._models
 
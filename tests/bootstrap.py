@@ -0,0 +1,62 @@
+import glob
+
+import numpy as np
+
+from src import *
+from src.tournament import Tournament, DROP_ALPHAS
+
+test_files = sorted(glob.glob("../data/*.yaml"))
+models = [(0.1, Iqr), (0.6, StdDeviation), (0.1, Mean), (0.2, SuperScoreModel)]
+
+
+def identity(b):
+    return np.arange(b.n_events)[None, :]
+
+
+def model_totals():
+    for f in test_files:
+        b = Bootstrap(f, models, DROP_ALPHAS, resamples=10, seed=0)
+        for model in (Iqr, StdDeviation, Mean):
+            m = model(f, DROP_ALPHAS[model])
+            m.drop()
+            expected = [m.ret_scores[s] for s in b.schools]
+            assert np.array_equal(b.model_scores(model, identity(b))[0], expected), (f, model)
+        m = SuperScoreModel(f, 0)
+        expected = [m.super_scores[s] for s in b.schools]
+        assert np.array_equal(b.model_scores(SuperScoreModel, identity(b))[0], expected), f
+
+
+def tournament_ranks():
+    for f in test_files:
+        t = Tournament(f, models)
+        t.aggregate()
+        b = t.bootstrap(resamples=10, seed=0)
+        prelim = dict(zip(b.schools, b.evaluate(identity(b))[0].tolist()))
+        assert prelim == t.prelim, f
+        # Tournament.ranks walks the prelim in order, ties only swap equal values
+        assert [prelim[s] for s in t.ranks] == sorted(prelim.values()), f
+
+
+def intervals():
+    f = "../data/2023-01-21_mit_invitational_c.yaml"
+    t = Tournament(f, models)
+    t.aggregate()
+    b = t.bootstrap(seed=0)
+    ranks = b.rank_intervals(0.95)
+    for i, school in enumerate(t.ranks[:8]):
+        lo, hi = ranks[school]
+        print(i + 1, school, (lo, hi), b.medal_probability()[school])
+    assert ranks[t.ranks[0]][0] == 1
+    assert np.isclose(sum(b.medal_probability().values()), b._results.tournament["medals"])
+    assert set(b.medal_probability(0).values()) == {0}
+    for confidence in (0.5, 0.9, 0.95):
+        for school, (lo, hi) in b.rank_intervals(confidence).items():
+            assert isinstance(lo, int) and isinstance(hi, int)
+            column = b.ranks[:, b.schools.index(school)]
+            assert lo in column and hi in column, (school, lo, hi)
+
+
+if __name__ == '__main__':
+    model_totals()
+    tournament_ranks()
+    intervals()
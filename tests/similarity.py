@@ -0,0 +1,115 @@
+import glob
+import os
+
+import numpy as np
+import yaml
+
+from src import *
+from src.tournament import Tournament, NATIONALS_PATH
+
+test_files = sorted(glob.glob("../data/*.yaml"))
+mit = "../data/2023-01-21_mit_invitational_c.yaml"
+
+
+def schools(path):
+    with open(path, "r") as f:
+        return [t["school"] for t in yaml.safe_load(f)["Teams"]]
+
+
+def signature():
+    index = SimilarityIndex()
+    sig = index.signature(["A", "B", "C"])
+    assert sig.shape == (index.num_perm,)
+    assert np.array_equal(sig, index.signature(["C", "B", "A", "A"]))
+    assert np.array_equal(sig, SimilarityIndex().signature(["A", "B", "C"]))  # seeded
+    # minhash collision rate estimates jaccard
+    a, b = [str(i) for i in range(100)], [str(i) for i in range(50, 150)]
+    est = np.mean(index.signature(a) == index.signature(b))
+    assert abs(est - 1 / 3) < 4 * np.sqrt((1 / 3) * (2 / 3) / index.num_perm)
+
+
+def jaccard():
+    index = SimilarityIndex(test_files)
+    for a in test_files:
+        for b in test_files:
+            sa, sb = set(schools(a)), set(schools(b))
+            assert index.jaccard(a, b) == len(sa & sb) / len(sa | sb)
+
+
+def strength():
+    index = SimilarityIndex(test_files)
+    national = set(schools(NATIONALS_PATH))
+    strengths = index.field_strengths(NATIONALS_PATH)
+    for f in test_files:
+        exact = len(set(schools(f)) & national) / len(schools(f))
+        assert strengths[index_key(f)] == exact
+        assert index.strength_of_field(f, NATIONALS_PATH) == exact
+        assert index.strength_of_field(schools(f), schools(NATIONALS_PATH)) == exact
+
+
+def tournament():
+    index = SimilarityIndex(test_files)
+    for f in test_files:
+        exact = Tournament(f, [(1, SuperScoreModel)])
+        indexed = Tournament(f, [(1, SuperScoreModel)], index=index)
+        assert exact.tourney_weight == indexed.tourney_weight
+        print(f, exact.tourney_weight)
+
+
+def storage():
+    index = SimilarityIndex()
+    index.strength_of_field(schools(mit), NATIONALS_PATH)
+    assert list(index._references) == [index_key(NATIONALS_PATH)]  # reference is cached
+    index.similar(mit, threshold=0)
+    index.jaccard(mit, "../data/2023-02-18_penn_invitational_c.yaml")
+    assert list(index._references) == [index_key(NATIONALS_PATH)]  # queries are not
+
+    for f in test_files:
+        index.add(f)
+    assert index._references == {}  # indexed rosters only live as ids
+    strengths = index.field_strengths(NATIONALS_PATH)
+    assert index.field_strengths(NATIONALS_PATH) is strengths  # cached per reference
+    assert index.strength_of_field(mit, NATIONALS_PATH) == strengths[index_key(mit)]
+    assert index.jaccard(mit, mit) == 1.0
+
+
+def read_only():
+    index = SimilarityIndex([mit])
+    index.strength_of_field(mit, NATIONALS_PATH)
+    index.similar(NATIONALS_PATH, threshold=0)
+    index.jaccard(NATIONALS_PATH, mit)
+    assert len(index) == 1 and NATIONALS_PATH not in index
+    assert list(index.field_strengths(NATIONALS_PATH)) == [index_key(mit)]
+
+    index.add("../data/../data/2023-01-21_mit_invitational_c.yaml")
+    assert len(index) == 1 and mit in index
+
+
+def similar():
+    index = SimilarityIndex(test_files)
+    found = dict(index.similar(mit, threshold=0.1))
+    assert index_key(mit) not in found
+    assert index_key(NATIONALS_PATH) in found
+    assert index_key("../data/2023-02-18_penn_invitational_c.yaml") in found
+    for f in test_files:
+        if f != mit:
+            assert (index_key(f) in found) == (index.jaccard(mit, f) >= 0.1)
+    print(found)
+
+    # above the banding threshold candidates come from the buckets
+    assert index.similar(mit, threshold=0.5) == []
+    assert index.similar(schools(mit), threshold=0.5) == [(index_key(mit), 1.0)]
+
+
+def index_key(path):
+    return os.path.abspath(path)
+
+
+if __name__ == '__main__':
+    signature()
+    jaccard()
+    strength()
+    tournament()
+    storage()
+    read_only()
+    similar()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import numpy as np
+
+PRELIM_DECIMALS = 9  # weighted rank sums are rounded so float noise can't break ties
+
+
+def average_ranks(scores: np.ndarray) -> np.ndarray:
+    """
+    :param scores: np.ndarray (..., n), lower is better
+    :return: np.ndarray same shape as scores, 1 based ranks along the last axis, ties share the average rank
+    :exe: [10, 20, 10, 30] -> [1.5, 3, 1.5, 4]
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[-1]
+    order = np.argsort(scores, axis=-1, kind="stable")
+    ordered = np.take_along_axis(scores, order, axis=-1)
+    pos = np.broadcast_to(np.arange(n), ordered.shape)
+
+    starts = np.ones(ordered.shape, dtype=bool)
+    starts[..., 1:] = ordered[..., 1:] != ordered[..., :-1]
+    ends = np.ones(ordered.shape, dtype=bool)
+    ends[..., :-1] = starts[..., 1:]
+    first = np.maximum.accumulate(np.where(starts, pos, 0), axis=-1)
+    last = np.flip(
+        np.minimum.accumulate(np.flip(np.where(ends, pos, n), axis=-1), axis=-1),
+        axis=-1,
+    )
+
+    ranks = np.empty(ordered.shape)
+    np.put_along_axis(ranks, order, (first + last) / 2 + 1, axis=-1)
+    return ranks